@@ -8,7 +8,9 @@ import warnings
 from getpass import getpass
 
 import requests
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util.retry import Retry
 
 # 抑制 SSL 不安全警告（南科大 TIS 的证书有时配置不当）
 warnings.filterwarnings("ignore", category=InsecureRequestWarning)
@@ -24,9 +26,39 @@ HEADERS = {
     "X-Requested-With": "XMLHttpRequest",
 }
 
+# 直接在响应的原始字节上匹配，省去对整个页面做编码探测和解码
+_EXEC_RE = re.compile(rb'name="execution"\s+value="([^"]+)"')
+# Set-Cookie 头本身已是 str
+_ROUTE_RE = re.compile(r"route=([^;]+)")
+_JSID_RE = re.compile(r"JSESSIONID=([^;]+)")
+
+
+def create_session() -> requests.Session:
+    """创建带连接池和 keep-alive 的会话，CAS 与 TIS 的全部请求共用。"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.verify = False
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.3),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def _parse_execution(page: bytes) -> str | None:
+    """从 CAS 登录页（原始字节）中解析 execution token，找不到时返回 None。"""
+    match = _EXEC_RE.search(page)
+    return match.group(1).decode("ascii") if match else None
+
 
-def cas_login(student_id: str, password: str) -> dict[str, str]:
-    """通过 CAS 登录并返回 TIS 所需的请求头（含 Cookie）。
+def cas_login(
+    student_id: str,
+    password: str,
+    session: requests.Session | None = None,
+) -> requests.Session:
+    """通过 CAS 登录并返回已携带 TIS Cookie 的会话。
 
     Parameters
     ----------
@@ -34,11 +66,14 @@ def cas_login(student_id: str, password: str) -> dict[str, str]:
         学号
     password : str
         CAS 密码
+    session : requests.Session | None
+        复用的会话，为 None 时新建一个。重试时传入同一个会话，
+        可直接复用上次失败返回的登录页，省去重新获取登录页
 
     Returns
     -------
-    dict[str, str]
-        包含 cookie 和 UA 的请求头字典，可直接用于后续 TIS 请求
+    requests.Session
+        请求头中已包含 cookie 和 UA 的会话，可直接用于后续 TIS 请求
 
     Raises
     ------
@@ -47,18 +82,23 @@ def cas_login(student_id: str, password: str) -> dict[str, str]:
     ValueError
         用户名或密码错误
     """
-    # 1. GET 登录页，获取 execution token
-    try:
-        resp = requests.get(CAS_LOGIN_URL, headers=HEADERS, verify=False, timeout=15)
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        raise ConnectionError(f"无法连接到 CAS 服务器，请检查网络: {e}") from e
-
-    # 解析 execution token
-    match = re.search(r'name="execution"\s+value="([^"]+)"', resp.text)
-    if not match:
-        raise ConnectionError("无法从 CAS 页面解析 execution token，CAS 页面结构可能已变更")
-    execution = match.group(1)
+    if session is None:
+        session = create_session()
+
+    # 1. 获取 execution token：优先复用上次登录失败时 CAS 返回的登录页，省去一次 GET
+    execution = _parse_execution(getattr(session, "_cas_login_page", b""))
+    if execution is None:
+        try:
+            resp = session.get(CAS_LOGIN_URL, timeout=15)
+            resp.raise_for_status()
+        except requests.RequestException as e:
+            raise ConnectionError(f"无法连接到 CAS 服务器，请检查网络: {e}") from e
+
+        execution = _parse_execution(resp.content)
+        if execution is None:
+            raise ConnectionError("无法从 CAS 页面解析 execution token，CAS 页面结构可能已变更")
+    # execution token 只能使用一次
+    session._cas_login_page = b""
 
     # 2. POST 登录
     login_data = {
@@ -68,12 +108,10 @@ def cas_login(student_id: str, password: str) -> dict[str, str]:
         "_eventId": "submit",
         "geolocation": "",
     }
-    resp = requests.post(
+    resp = session.post(
         CAS_LOGIN_URL,
         data=login_data,
-        headers=HEADERS,
         allow_redirects=False,
-        verify=False,
         timeout=15,
     )
 
@@ -81,20 +119,21 @@ def cas_login(student_id: str, password: str) -> dict[str, str]:
         raise ConnectionError("CAS 服务出错 (HTTP 500)，请稍后重试")
 
     if "Location" not in resp.headers:
+        # CAS 返回的错误页中带有新的 execution，留给下一次重试直接解析
+        session._cas_login_page = resp.content
         raise ValueError("用户名或密码错误，请检查")
 
     # 3. 跟随重定向到 TIS，获取 Cookie
     redirect_url = resp.headers["Location"]
-    resp = requests.get(
+    resp = session.get(
         redirect_url,
-        headers=HEADERS,
         allow_redirects=False,
-        verify=False,
         timeout=15,
     )
 
-    route_match = re.search(r"route=([^;]+)", resp.headers.get("Set-Cookie", ""))
-    jsessionid_match = re.search(r"JSESSIONID=([^;]+)", resp.headers.get("Set-Cookie", ""))
+    set_cookie = resp.headers.get("Set-Cookie", "")
+    route_match = _ROUTE_RE.search(set_cookie)
+    jsessionid_match = _JSID_RE.search(set_cookie)
 
     if not route_match or not jsessionid_match:
         raise ConnectionError("登录成功但无法获取 TIS Cookie，请重试")
@@ -102,15 +141,14 @@ def cas_login(student_id: str, password: str) -> dict[str, str]:
     route = route_match.group(1)
     jsessionid = jsessionid_match.group(1)
 
-    # 构建用于后续请求的 headers
-    tis_headers = {
-        **HEADERS,
-        "Cookie": f"route={route}; JSESSIONID={jsessionid};",
-    }
-    return tis_headers
+    # 将 TIS Cookie 写入会话请求头，供后续请求使用
+    session.headers["Cookie"] = f"route={route}; JSESSIONID={jsessionid};"
+    # 记录登录的学号，课程缓存按学生区分
+    session.student_id = student_id
+    return session
 
 
-def interactive_login() -> dict[str, str]:
+def interactive_login() -> requests.Session:
     """交互式登录：从环境变量或终端输入获取凭据。
 
     环境变量:
@@ -119,19 +157,23 @@ def interactive_login() -> dict[str, str]:
 
     Returns
     -------
-    dict[str, str]
-        TIS 请求头
+    requests.Session
+        已登录 TIS 的会话
     """
+    # 只有密码错误（ValueError）后才复用会话，以便复用 CAS 返回的新 execution
+    session = create_session()
     sid = os.environ.get("SUSTECH_SID", "")
     pwd = os.environ.get("SUSTECH_PWD", "")
 
     if sid and pwd:
         print("[*] 从环境变量读取凭据...")
         try:
-            return cas_login(sid, pwd)
+            return cas_login(sid, pwd, session)
         except (ConnectionError, ValueError) as e:
             print(f"[!] 环境变量凭据登录失败: {e}")
             print("[*] 切换到手动输入...")
+            if isinstance(e, ConnectionError):
+                session = create_session()
 
     # 手动输入
     max_retries = 3
@@ -139,15 +181,18 @@ def interactive_login() -> dict[str, str]:
         sid = input("请输入学号: ").strip()
         pwd = getpass("请输入 CAS 密码（输入不显示）: ")
         try:
-            headers = cas_login(sid, pwd)
+            session = cas_login(sid, pwd, session)
             print("[+] 登录成功！")
-            return headers
+            return session
         except ValueError as e:
             print(f"[x] {e}")
             if attempt < max_retries - 1:
                 print(f"[*] 请重试 ({attempt + 2}/{max_retries})...")
         except ConnectionError as e:
             print(f"[x] {e}")
+            # 会话可能已带上 CAS 登录态（如 CAS 成功但获取 TIS Cookie 失败），
+            # 再次访问登录页会被直接重定向而拿不到 execution，因此换用新会话
+            session = create_session()
             if attempt < max_retries - 1:
                 print(f"[*] 请重试 ({attempt + 2}/{max_retries})...")
 
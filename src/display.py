@@ -3,11 +3,11 @@
 from __future__ import annotations
 
 from rich.console import Console
+from rich.markup import escape
 from rich.table import Table
-from rich.text import Text
 from rich.panel import Panel
 
-from .models import Section, WEEKDAY_NAMES, PERIOD_TIMES
+from .models import Course, Section, WEEKDAY_NAMES, PERIOD_TIMES
 
 console = Console()
 
@@ -33,10 +33,43 @@ def _get_color(index: int) -> str:
     return COLORS[index % len(COLORS)]
 
 
+def build_color_map(courses: list[Course]) -> dict[str, str]:
+    """按课程（而非教学班的课程名）分配颜色，翻页时同一门课颜色保持不变。
+
+    模糊匹配可能把多个课程名的教学班合并为同一门课，它们共用一种颜色；
+    每个方案中每门课只选一个教学班，因此同一方案内的颜色互不相同。
+    """
+    color_map: dict[str, str] = {}
+    for i, course in enumerate(courses):
+        color = _get_color(i)
+        for sec in course.sections:
+            color_map.setdefault(sec.course_name, color)
+    return color_map
+
+
+def make_empty_table(title: str) -> Table:
+    """创建已添加好节次和周一到周五列的空课表。"""
+    table = Table(
+        title=title,
+        show_header=True,
+        header_style="bold",
+        border_style="bright_black",
+        title_style="bold bright_white",
+        padding=(0, 1),
+    )
+
+    # 添加列：节次 + 周一到周五
+    table.add_column("节次", style="dim", width=14, justify="center")
+    for wd_name in WEEKDAY_NAMES:
+        table.add_column(wd_name, width=16, justify="center")
+    return table
+
+
 def display_schedule(
     schedule: list[Section],
     scheme_index: int,
     total_schemes: int,
+    color_map: dict[str, str],
 ) -> None:
     """在终端以课表矩阵的形式展示一种选课方案。
 
@@ -48,13 +81,9 @@ def display_schedule(
         方案编号（从 1 开始）
     total_schemes : int
         总方案数
+    color_map : dict[str, str]
+        课程名 -> 颜色，由 build_color_map 预先构建
     """
-    # 构建课程名到颜色的映射
-    course_names = list(dict.fromkeys(s.course_name for s in schedule))
-    color_map: dict[str, str] = {
-        name: _get_color(i) for i, name in enumerate(course_names)
-    }
-
     # 构建 5x11 的课表网格 (weekday, period) -> 显示文本
     grid: dict[tuple[int, int], tuple[str, str, str]] = {}  # (wd, p) -> (课程名, 教师, 颜色)
 
@@ -69,67 +98,61 @@ def display_schedule(
                 )
 
     # 创建 rich Table
-    table = Table(
-        title=f"方案 {scheme_index}/{total_schemes}",
-        show_header=True,
-        header_style="bold",
-        border_style="bright_black",
-        title_style="bold bright_white",
-        padding=(0, 1),
-    )
-
-    # 添加列：节次 + 周一到周五
-    table.add_column("节次", style="dim", width=14, justify="center")
-    for wd_name in WEEKDAY_NAMES:
-        table.add_column(wd_name, width=16, justify="center")
+    table = make_empty_table(f"方案 {scheme_index}/{total_schemes}")
 
     # 添加行：第 1-11 节
     for period in range(1, 12):
         time_str = PERIOD_TIMES.get(period, "")
         row_label = f"第{period:>2}节\n{time_str}"
 
-        cells: list[Text | str] = [row_label]
+        cells: list[str] = [row_label]
         for weekday in range(5):
             entry = grid.get((weekday, period))
             if entry:
                 course_name, teacher, color = entry
-                # 截断过长的课程名
+                # 截断过长的课程名，用 markup 字符串代替 Text 对象
                 display_name = course_name if len(course_name) <= 8 else course_name[:7] + "…"
-                cell = Text()
-                cell.append(display_name + "\n", style=f"bold {color}")
+                cell = f"[bold {color}]{escape(display_name)}[/]\n"
                 if teacher:
                     short_teacher = teacher if len(teacher) <= 6 else teacher[:5] + "…"
-                    cell.append(short_teacher, style=f"dim {color}")
+                    cell += f"[dim {color}]{escape(short_teacher)}[/]"
                 cells.append(cell)
             else:
                 cells.append("")
 
         table.add_row(*cells)
 
-    console.print(table)
-
-    # 打印方案详情
-    console.print()
-    for section in schedule:
-        color = color_map.get(section.course_name, "white")
-        slots_str = ", ".join(str(ts) for ts in section.time_slots)
-        if not slots_str:
-            slots_str = "时间未知"
-        console.print(
-            f"  [{color}]●[/{color}] {section.course_name}"
-            f"  {section.teacher or ''}"
-            f"  [dim]{slots_str}[/dim]"
-        )
-    console.print()
-
-
-def display_all_schedules(results: list[list[Section]]) -> None:
+    # with console: 期间的输出会先缓冲，退出时一次性写入终端
+    with console:
+        console.print(table)
+
+        # 打印方案详情
+        console.print()
+        for section in schedule:
+            color = color_map.get(section.course_name, "white")
+            slots_str = ", ".join(str(ts) for ts in section.time_slots)
+            if not slots_str:
+                slots_str = "时间未知"
+            console.print(
+                f"  [{color}]●[/{color}] {section.course_name}"
+                f"  {section.teacher or ''}"
+                f"  [dim]{slots_str}[/dim]"
+            )
+        console.print()
+
+
+def display_all_schedules(
+    results: list[list[Section]],
+    color_map: dict[str, str],
+) -> None:
     """展示所有可行的选课方案，支持交互式翻页。
 
     Parameters
     ----------
     results : list[list[Section]]
         所有可行的选课方案
+    color_map : dict[str, str]
+        课程名 -> 颜色，由 build_color_map 预先构建
     """
     if not results:
         console.print(Panel(
@@ -149,7 +172,7 @@ def display_all_schedules(results: list[list[Section]]) -> None:
     if total <= 5:
         # 方案少时直接全部展示
         for i, schedule in enumerate(results, 1):
-            display_schedule(schedule, i, total)
+            display_schedule(schedule, i, total, color_map)
             if i < total:
                 console.print("[dim]─" * 40 + "[/dim]\n")
     else:
@@ -163,7 +186,7 @@ def display_all_schedules(results: list[list[Section]]) -> None:
 
         idx = 0
         while idx < total:
-            display_schedule(results[idx], idx + 1, total)
+            display_schedule(results[idx], idx + 1, total, color_map)
 
             if idx < total - 1:
                 try:
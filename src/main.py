@@ -18,7 +18,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from src.auth import interactive_login, cas_login
 from src.scraper import get_semester_info, get_courses_for_selection
 from src.solver import solve, print_solve_summary
-from src.display import display_all_schedules, display_schedule
+from src.display import build_color_map, display_all_schedules, display_schedule
 from src.selector import select_schedule
 
 console = Console()
@@ -100,15 +100,15 @@ def main() -> None:
         pwd = config.get("password", "")
         if sid and pwd:
             console.print(f"[*] 使用配置文件中的凭据登录（学号: {sid}）...")
-            headers = cas_login(str(sid), str(pwd))
+            session = cas_login(str(sid), str(pwd))
             console.print("[+] 登录成功！")
         else:
-            headers = interactive_login()
+            session = interactive_login()
     except (RuntimeError, ConnectionError, ValueError) as e:
         console.print(f"[red]{e}[/red]")
         console.print("[*] 尝试手动登录...")
         try:
-            headers = interactive_login()
+            session = interactive_login()
         except RuntimeError as e2:
             console.print(f"[red]{e2}[/red]")
             sys.exit(1)
@@ -116,7 +116,7 @@ def main() -> None:
     # 3. 获取学期信息和课程数据
     console.print("\n[bold]步骤 3/4: 获取课程数据[/bold]")
     try:
-        semester_info = get_semester_info(headers)
+        semester_info = get_semester_info(session)
         semester_name = {
             "1": "秋季",
             "2": "春季",
@@ -131,7 +131,7 @@ def main() -> None:
         sys.exit(1)
 
     try:
-        courses = get_courses_for_selection(headers, semester_info, wanted_courses)
+        courses = get_courses_for_selection(session, semester_info, wanted_courses)
     except Exception as e:
         console.print(f"[red]获取课程数据失败: {e}[/red]")
         sys.exit(1)
@@ -150,17 +150,20 @@ def main() -> None:
 
     # 4. 求解
     console.print(f"\n[bold]步骤 4/4: 求解无冲突课表[/bold]")
-    results = solve(courses, max_results=2000)
-    print_solve_summary(courses, results)
+    solve_result = solve(courses, max_results=2000)
+    results = solve_result.schedules
+    print_solve_summary(courses, solve_result)
+    color_map = build_color_map(courses)
 
     # 展示结果并支持选课
     if not results:
-        display_all_schedules(results)
+        display_all_schedules(results, color_map)
         return
 
     total = len(results)
+    truncated_note = f"（已达上限，仅保留前 {total} 种）" if solve_result.truncated else ""
     console.print(Panel(
-        f"共找到 [bold green]{total}[/bold green] 种可行方案\n"
+        f"共找到 [bold green]{total}[/bold green] 种可行方案{truncated_note}\n"
         f"输入 [bold]方案编号[/bold] 查看详情，输入 [bold]s编号[/bold]（如 s1）直接选课，输入 [bold]q[/bold] 退出",
         title="求解结果",
         border_style="green",
@@ -183,11 +186,11 @@ def main() -> None:
                 if 1 <= idx <= total:
                     schedule = results[idx - 1]
                     console.print(f"\n[bold yellow]即将选择方案 {idx}:[/bold yellow]")
-                    display_schedule(schedule, idx, total)
+                    display_schedule(schedule, idx, total, color_map)
                     confirm = input("\n确认选课? 输入 YES 确认，其他取消: ").strip()
                     if confirm == "YES":
                         console.print("\n[bold]开始选课...[/bold]")
-                        sel_results = select_schedule(headers, semester_info, schedule)
+                        sel_results = select_schedule(session, semester_info, schedule)
                         console.print(f"\n[bold]选课完成！[/bold]")
                         ok = sum(1 for _, s, _ in sel_results if s)
                         fail = sum(1 for _, s, _ in sel_results if not s)
@@ -200,7 +203,7 @@ def main() -> None:
         if user_input.isdigit():
             idx = int(user_input)
             if 1 <= idx <= total:
-                display_schedule(results[idx - 1], idx, total)
+                display_schedule(results[idx - 1], idx, total, color_map)
                 continue
 
         console.print(f"[yellow]无效输入，请输入 1-{total} 或 s1-s{total}[/yellow]")
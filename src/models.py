@@ -22,6 +22,9 @@ PERIOD_TIMES: dict[int, str] = {
 
 WEEKDAY_NAMES: list[str] = ["周一", "周二", "周三", "周四", "周五"]
 
+# 每天的节数，用于把 (weekday, period) 映射到位掩码中的一位
+PERIODS_PER_DAY = 11
+
 WEEKDAY_MAP: dict[str, int] = {
     "一": 0,
     "二": 1,
@@ -40,10 +43,14 @@ class TimeSlot:
     weekday: int  # 0=周一, 4=周五
     start_period: int  # 第几节开始 (1-11)
     end_period: int  # 第几节结束 (1-11)
+    _periods: tuple[tuple[int, int], ...] = field(default=(), init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._periods = tuple((self.weekday, p) for p in range(self.start_period, self.end_period + 1))
 
-    def periods(self) -> list[tuple[int, int]]:
+    def periods(self) -> tuple[tuple[int, int], ...]:
         """返回该时间段占用的所有 (weekday, period) 元组"""
-        return [(self.weekday, p) for p in range(self.start_period, self.end_period + 1)]
+        return self._periods
 
     def __str__(self) -> str:
         wd = WEEKDAY_NAMES[self.weekday] if self.weekday < len(WEEKDAY_NAMES) else f"星期{self.weekday}"
@@ -60,13 +67,21 @@ class Section:
     course_type: str  # 选课类型代码 (bxxk, xxxk, ...)
     time_slots: list[TimeSlot] = field(default_factory=list)
     teacher: str = ""  # 授课教师
+    period_mask: int = field(default=0, init=False, repr=False, compare=False)  # 占用时间槽的位掩码
+    _all_periods: frozenset[tuple[int, int]] | None = field(default=None, init=False, repr=False, compare=False)
 
-    def all_periods(self) -> set[tuple[int, int]]:
-        """返回该教学班占用的全部时间槽集合"""
-        result: set[tuple[int, int]] = set()
+    def __post_init__(self) -> None:
+        mask = 0
         for ts in self.time_slots:
-            result.update(ts.periods())
-        return result
+            for weekday, p in ts.periods():
+                mask |= 1 << (weekday * PERIODS_PER_DAY + p - 1)
+        self.period_mask = mask
+
+    def all_periods(self) -> frozenset[tuple[int, int]]:
+        """返回该教学班占用的全部时间槽集合（首次调用后缓存）"""
+        if self._all_periods is None:
+            self._all_periods = frozenset(k for ts in self.time_slots for k in ts.periods())
+        return self._all_periods
 
     def __str__(self) -> str:
         slots_str = ", ".join(str(ts) for ts in self.time_slots)
@@ -45,18 +45,12 @@ def get_occupied(sections: list[Section]) -> set[tuple[int, int]]:
     """从一组教学班中提取所有已占用的时间槽。"""
     occupied: set[tuple[int, int]] = set()
     for sec in sections:
-        for ts in sec.time_slots:
-            for p in range(ts.start_period, ts.end_period + 1):
-                occupied.add((ts.weekday, p))
+        occupied.update(sec.all_periods())
     return occupied
 
 
 def has_conflict(section: Section, occupied: set[tuple[int, int]]) -> bool:
-    for ts in section.time_slots:
-        for p in range(ts.start_period, ts.end_period + 1):
-            if (ts.weekday, p) in occupied:
-                return True
-    return False
+    return not occupied.isdisjoint(section.all_periods())
 
 
 def print_current_schedule(selected: list[Section], used_pts: int, remain_pts: int) -> None:
@@ -151,27 +145,27 @@ def main() -> None:
     if sid and pwd:
         console.print(f"[*] 登录中（学号: {sid}）...")
         try:
-            headers = cas_login(str(sid), str(pwd))
+            session = cas_login(str(sid), str(pwd))
             console.print("[+] 登录成功！\n")
         except Exception as e:
             console.print(f"[red]{e}[/red]")
-            headers = interactive_login()
+            session = interactive_login()
     else:
-        headers = interactive_login()
+        session = interactive_login()
 
-    semester_info = get_semester_info(headers)
+    semester_info = get_semester_info(session)
     semester_name = {"1": "秋", "2": "春", "3": "夏"}.get(str(semester_info.get("p_xq", "")), "?")
     console.print(f"学期: {semester_info.get('p_xn', '?')} {semester_name}季\n")
 
     # 获取已选课程
     console.print("[bold]获取已选课程...[/bold]")
-    selected, used_pts, remain_pts = fetch_selected_courses(headers, semester_info)
+    selected, used_pts, remain_pts = fetch_selected_courses(session, semester_info)
     print_current_schedule(selected, used_pts, remain_pts)
     occupied = get_occupied(selected)
 
     # 获取全部课程数据
     console.print("[bold]获取全部课程数据...[/bold]")
-    all_courses = fetch_all_courses(headers, semester_info)
+    all_courses = fetch_all_courses(session, semester_info)
 
     # 硬编码补充
     if "数理逻辑导论" not in all_courses:
@@ -241,7 +235,7 @@ def main() -> None:
 
         if cmd.lower() == "r":
             console.print("[*] 刷新已选课程...")
-            selected, used_pts, remain_pts = fetch_selected_courses(headers, semester_info)
+            selected, used_pts, remain_pts = fetch_selected_courses(session, semester_info)
             print_current_schedule(selected, used_pts, remain_pts)
             occupied = get_occupied(selected)
             selected_names = {sec.course_name for sec in selected}
@@ -296,7 +290,7 @@ def main() -> None:
             continue
 
         console.print("[*] 提交选课请求...", end=" ")
-        success, msg = select_course(headers, semester_info, chosen)
+        success, msg = select_course(session, semester_info, chosen)
         if success:
             console.print(f"[bold green]成功![/bold green] {msg}")
             # 更新本地状态
@@ -3,14 +3,27 @@
 from __future__ import annotations
 
 import re
+import os
 import json
+import hashlib
+import time
 import warnings
 from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
 
 import requests
 from urllib3.exceptions import InsecureRequestWarning
 
-from .models import Course, Section, TimeSlot, WEEKDAY_MAP
+# orjson 为可选依赖，安装后用于加速解析 TIS 返回的大量 JSON 数据
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+from .models import Course, Section, TimeSlot, WEEKDAY_MAP, PERIODS_PER_DAY
 
 warnings.filterwarnings("ignore", category=InsecureRequestWarning)
 
@@ -28,12 +41,36 @@ COURSE_TYPES: dict[str, str] = {
     "jhnxk": "计划内选课新生",
 }
 
+# 课程数据本地缓存：按学年学期和学号存放，超过有效期或设置 SUSTECH_REFRESH=1 时重新抓取
+CACHE_DIR = Path.home() / ".cache" / "sustech-solver"
+CACHE_TTL = 6 * 3600  # 秒
+
 # 时间正则：匹配 "星期一第1-2节" 这种格式
 TIME_PATTERN = re.compile(r"星期([一二三四五六日])第(\d+)-(\d+)节")
+_time_search = TIME_PATTERN.search
+_finditer = TIME_PATTERN.finditer
+_wd = WEEKDAY_MAP
+
+# 常见的时间字段名，按优先级排列
+TIME_FIELDS = ("sksj", "sksjms", "sksjStr", "sksjdd")
+
+
+def _extract_time_str(item: dict) -> str:
+    """从 TIS 返回的单条记录中提取上课时间描述。"""
+    for time_field in TIME_FIELDS:
+        if item.get(time_field):
+            return str(item[time_field])
+
+    # 如果上面的字段都没有，只在字符串类型的字段值中查找时间；
+    # 先用廉价的子串判断过滤掉绝大多数字段，再做正则匹配
+    return " ".join(
+        v for v in item.values()
+        if isinstance(v, str) and "星期" in v and _time_search(v)
+    )
 
 
 def fetch_selected_courses(
-    headers: dict[str, str],
+    session: requests.Session,
     semester_info: dict,
 ) -> tuple[list[Section], int, int]:
     """获取当前已选课程列表和积分信息。
@@ -52,15 +89,13 @@ def fetch_selected_courses(
         "p_xnxq": semester_info["p_xnxq"],
         "p_xkfsdm": "bxxk",
     }
-    resp = requests.post(
+    resp = session.post(
         QUERY_COURSES_URL,
         data=data,
-        headers=headers,
-        verify=False,
         timeout=30,
     )
     resp.raise_for_status()
-    raw = resp.json()
+    raw = _json_loads(resp.content)
 
     selected: list[Section] = []
     yxkc_list = raw.get("yxkcList", [])
@@ -71,17 +106,7 @@ def fetch_selected_courses(
             teacher = item.get("dgjsmc", "") or ""
             points = item.get("xkxs", "?")
 
-            time_str = ""
-            for tf in ["sksj", "sksjms", "sksjStr", "sksjdd"]:
-                if item.get(tf):
-                    time_str = str(item[tf])
-                    break
-            if not time_str:
-                item_str = json.dumps(item, ensure_ascii=False)
-                if TIME_PATTERN.search(item_str):
-                    time_str = item_str
-
-            time_slots = parse_time_slots(time_str)
+            time_slots = parse_time_slots(_extract_time_str(item))
             sec = Section(
                 course_name=course_name,
                 section_name=f"{course_name} - {teacher}" if teacher else course_name,
@@ -106,7 +131,7 @@ def fetch_selected_courses(
     return selected, used_points, remaining_points
 
 
-def get_semester_info(headers: dict[str, str]) -> dict:
+def get_semester_info(session: requests.Session) -> dict:
     """获取当前学期信息。
 
     Returns
@@ -114,15 +139,13 @@ def get_semester_info(headers: dict[str, str]) -> dict:
     dict
         包含 p_xn, p_xq, p_xnxq 等字段的字典
     """
-    resp = requests.post(
+    resp = session.post(
         QUERY_SEMESTER_URL,
         data={"mxpylx": 1},
-        headers=headers,
-        verify=False,
         timeout=15,
     )
     resp.raise_for_status()
-    data = resp.json()
+    data = _json_loads(resp.content)
     if "p_xn" not in data:
         raise RuntimeError(f"获取学期信息失败，返回数据异常: {resp.text[:200]}")
     return data
@@ -143,130 +166,251 @@ def parse_time_slots(time_str: str) -> list[TimeSlot]:
     Returns
     -------
     list[TimeSlot]
+        超出第 1-11 节范围的时间段会被丢弃并给出提示
     """
     slots: list[TimeSlot] = []
-    for match in TIME_PATTERN.finditer(time_str):
+    for match in _finditer(time_str):
         weekday_char = match.group(1)
         start = int(match.group(2))
         end = int(match.group(3))
-        weekday = WEEKDAY_MAP.get(weekday_char)
-        if weekday is not None:
-            slots.append(TimeSlot(weekday=weekday, start_period=start, end_period=end))
+        weekday = _wd.get(weekday_char)
+        if weekday is None:
+            continue
+        # 节次越界会让位掩码溢出到相邻的天（或出现负数位移），直接丢弃
+        if not 1 <= start <= end <= PERIODS_PER_DAY:
+            print(f"  [!] 忽略无效的上课时间: {match.group(0)}")
+            continue
+        slots.append(TimeSlot(weekday=weekday, start_period=start, end_period=end))
     return slots
 
 
+def _fetch_type(
+    session: requests.Session,
+    semester_info: dict,
+    c_type: str,
+) -> tuple[list[Section], str | None]:
+    """分页抓取某一种选课类型下的全部教学班。
+
+    在线程池中运行，不直接打印进度，由调用方按固定顺序统一输出。
+
+    Returns
+    -------
+    tuple[list[Section], str | None]
+        (教学班列表, 错误信息；完整抓取时为 None)
+    """
+    sections: list[Section] = []
+    error: str | None = None
+    page_num = 1
+    page_size = 500  # TIS 服务端分页上限为 500
+
+    while True:
+        data = {
+            "p_xn": semester_info["p_xn"],
+            "p_xq": semester_info["p_xq"],
+            "p_xnxq": semester_info["p_xnxq"],
+            "p_pylx": 1,
+            "mxpylx": 1,
+            "p_xkfsdm": c_type,
+            "pageNum": page_num,
+            "pageSize": page_size,
+        }
+
+        try:
+            resp = session.post(
+                QUERY_COURSES_URL,
+                data=data,
+                timeout=30,
+            )
+            resp.raise_for_status()
+            raw = _json_loads(resp.content)
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            error = f"第{page_num}页失败: {e}"
+            break
+
+        course_list = raw.get("kxrwList", {})
+        if isinstance(course_list, dict):
+            course_list = course_list.get("list", [])
+        elif not isinstance(course_list, list):
+            course_list = []
+
+        if not course_list:
+            break
+
+        for item in course_list:
+            course_name = item.get("rwmc", "未知课程")
+            section_name = item.get("rwmc", course_name)
+            section_id = item.get("id", "")
+            teacher = item.get("dgjsmc", "") or ""
+
+            # 尝试从多个可能的字段中提取时间信息
+            time_slots = parse_time_slots(_extract_time_str(item))
+
+            # 构建教学班显示名：课程名 + 教师
+            display_name = section_name
+            if teacher:
+                display_name = f"{section_name} - {teacher}"
+
+            section = Section(
+                course_name=course_name,
+                section_name=display_name,
+                section_id=section_id,
+                course_type=c_type,
+                time_slots=time_slots,
+                teacher=teacher,
+            )
+            sections.append(section)
+
+        # 本页原始数据已转换为 Section，立即释放，避免请求下一页期间仍占用内存
+        page_count = len(course_list)
+        del resp, raw, course_list, item
+
+        # 如果本页数量不足 page_size，说明已经是最后一页
+        if page_count < page_size:
+            break
+
+        # 还有更多页，继续获取
+        page_num += 1
+
+    return sections, error
+
+
+def _cache_path(session: requests.Session, semester_info: dict) -> Path | None:
+    """返回某学生某学期课程数据的缓存文件路径，无法确定学生时返回 None。
+
+    培养方案内、重修等选课类型返回的课程因人而异，因此缓存按学号区分；
+    文件名中只使用学号的哈希值。
+    """
+    student_id = getattr(session, "student_id", "")
+    if not student_id:
+        return None
+    sid_hash = hashlib.sha256(student_id.encode("utf-8")).hexdigest()[:16]
+    return CACHE_DIR / f"{semester_info['p_xn']}_{semester_info['p_xq']}_{sid_hash}.json"
+
+
+def _load_cache(path: Path) -> dict[str, list[Section]] | None:
+    """读取未过期的课程缓存，不存在、已过期或无法解析时返回 None。"""
+    try:
+        if time.time() - path.stat().st_mtime > CACHE_TTL:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            return None
+        return {
+            course_name: [
+                Section(
+                    course_name=sec["course_name"],
+                    section_name=sec["section_name"],
+                    section_id=sec["section_id"],
+                    course_type=sec["course_type"],
+                    time_slots=[TimeSlot(*slot) for slot in sec["time_slots"]],
+                    teacher=sec["teacher"],
+                )
+                for sec in sections
+            ]
+            for course_name, sections in raw.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_cache(path: Path, course_map: dict[str, list[Section]]) -> None:
+    """将课程数据写入缓存文件，写入失败只提示不中断。"""
+    raw = {
+        course_name: [
+            {
+                "course_name": sec.course_name,
+                "section_name": sec.section_name,
+                "section_id": sec.section_id,
+                "course_type": sec.course_type,
+                "time_slots": [[ts.weekday, ts.start_period, ts.end_period] for ts in sec.time_slots],
+                "teacher": sec.teacher,
+            }
+            for sec in sections
+        ]
+        for course_name, sections in course_map.items()
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"  [!] 写入课程缓存失败: {e}")
+
+
 def fetch_all_courses(
-    headers: dict[str, str],
+    session: requests.Session,
     semester_info: dict,
 ) -> dict[str, list[Section]]:
     """从 TIS 抓取当前学期所有课程信息。
 
+    六种选课类型互不相关，在线程池中并发抓取，共用同一个会话的连接池。
+    完整抓取的结果会缓存到 CACHE_DIR，有效期内再次运行直接读取缓存；
+    设置环境变量 SUSTECH_REFRESH=1 可强制重新抓取。
+
     Returns
     -------
     dict[str, list[Section]]
         课程名 -> 该课程所有教学班列表
     """
+    cache_path = _cache_path(session, semester_info)
+    if cache_path is not None and os.environ.get("SUSTECH_REFRESH") != "1":
+        cached = _load_cache(cache_path)
+        if cached is not None:
+            total = sum(len(secs) for secs in cached.values())
+            print(f"[+] 从缓存读取课程信息，共 {len(cached)} 门课程，{total} 个教学班（{cache_path}）")
+            return cached
+
     course_map: dict[str, list[Section]] = defaultdict(list)
 
-    for c_type, c_name in COURSE_TYPES.items():
-        print(f"  [*] 获取 {c_name} 列表...")
-
-        page_num = 1
-        page_size = 500  # TIS 服务端分页上限为 500
-        total_fetched = 0
-
-        while True:
-            data = {
-                "p_xn": semester_info["p_xn"],
-                "p_xq": semester_info["p_xq"],
-                "p_xnxq": semester_info["p_xnxq"],
-                "p_pylx": 1,
-                "mxpylx": 1,
-                "p_xkfsdm": c_type,
-                "pageNum": page_num,
-                "pageSize": page_size,
-            }
+    print(f"  [*] 并发获取 {len(COURSE_TYPES)} 种选课类型的课程列表...")
+    with ThreadPoolExecutor(max_workers=len(COURSE_TYPES)) as executor:
+        type_results = list(executor.map(
+            partial(_fetch_type, session, semester_info),
+            COURSE_TYPES.keys(),
+        ))
+
+    # 按 COURSE_TYPES 的顺序合并并输出进度，保证结果与日志都与串行抓取一致
+    for c_name, (sections, error) in zip(COURSE_TYPES.values(), type_results):
+        if error:
+            print(f"  [!] 获取 {c_name} {error}")
+        if sections:
+            print(f"  [+] {c_name}: 共获取到 {len(sections)} 个教学班")
+        for section in sections:
+            course_map[section.course_name].append(section)
 
-            try:
-                resp = requests.post(
-                    QUERY_COURSES_URL,
-                    data=data,
-                    headers=headers,
-                    verify=False,
-                    timeout=30,
-                )
-                resp.raise_for_status()
-                raw = resp.json()
-            except (requests.RequestException, json.JSONDecodeError) as e:
-                print(f"  [!] 获取 {c_name} 第{page_num}页失败: {e}")
-                break
-
-            course_list = raw.get("kxrwList", {})
-            if isinstance(course_list, dict):
-                course_list = course_list.get("list", [])
-            elif not isinstance(course_list, list):
-                course_list = []
-
-            if not course_list:
-                break
-
-            for item in course_list:
-                course_name = item.get("rwmc", "未知课程")
-                section_name = item.get("rwmc", course_name)
-                section_id = item.get("id", "")
-                teacher = item.get("dgjsmc", "") or ""
-
-                # 尝试从多个可能的字段中提取时间信息
-                time_str = ""
-                # 常见的时间字段名
-                for time_field in ["sksj", "sksjms", "sksjStr", "sksjdd"]:
-                    if item.get(time_field):
-                        time_str = str(item[time_field])
-                        break
-
-                # 如果上面的字段都没有，尝试从整个 item 的字符串表示中提取
-                if not time_str:
-                    item_str = json.dumps(item, ensure_ascii=False)
-                    if TIME_PATTERN.search(item_str):
-                        time_str = item_str
-
-                time_slots = parse_time_slots(time_str)
-
-                # 构建教学班显示名：课程名 + 教师
-                display_name = section_name
-                if teacher:
-                    display_name = f"{section_name} - {teacher}"
-
-                section = Section(
-                    course_name=course_name,
-                    section_name=display_name,
-                    section_id=section_id,
-                    course_type=c_type,
-                    time_slots=time_slots,
-                    teacher=teacher,
-                )
-                course_map[course_name].append(section)
+    total = sum(len(secs) for secs in course_map.values())
+    print(f"[+] 课程信息获取完毕，共 {len(course_map)} 门课程，{total} 个教学班")
 
-            total_fetched += len(course_list)
+    # 只缓存完整的抓取结果，避免把残缺数据保留到下次运行
+    if cache_path is not None and course_map and all(error is None for _, error in type_results):
+        _save_cache(cache_path, course_map)
+    return dict(course_map)
 
-            # 如果本页数量不足 page_size，说明已经是最后一页
-            if len(course_list) < page_size:
-                break
 
-            # 还有更多页，继续获取
-            page_num += 1
-            print(f"  [*] {c_name}: 已获取 {total_fetched} 个，继续获取第 {page_num} 页...")
+def _shingles(text: str) -> set[str]:
+    """返回字符串（小写）中所有相邻两个字符组成的片段。"""
+    text = text.lower()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
 
-        if total_fetched > 0:
-            print(f"  [+] {c_name}: 共获取到 {total_fetched} 个教学班")
 
-    total = sum(len(secs) for secs in course_map.values())
-    print(f"[+] 课程信息获取完毕，共 {len(course_map)} 门课程，{total} 个教学班")
-    return dict(course_map)
+def _build_shingle_index(course_names: Iterable[str]) -> dict[str, list[str]]:
+    """构建 二元组片段 -> 包含该片段的课程名 的倒排索引。
+
+    不足两个字符的课程名没有片段，统一放在键 "" 下，查询时总是作为候选。
+    """
+    index: dict[str, list[str]] = defaultdict(list)
+    for course_name in course_names:
+        shingles = _shingles(course_name)
+        if not shingles:
+            index[""].append(course_name)
+        for shingle in shingles:
+            index[shingle].append(course_name)
+    return dict(index)
 
 
 def get_courses_for_selection(
-    headers: dict[str, str],
+    session: requests.Session,
     semester_info: dict,
     wanted_course_names: list[str],
 ) -> list[Course]:
@@ -274,8 +418,8 @@ def get_courses_for_selection(
 
     Parameters
     ----------
-    headers : dict[str, str]
-        已登录的请求头
+    session : requests.Session
+        已登录 TIS 的会话
     semester_info : dict
         学期信息
     wanted_course_names : list[str]
@@ -287,7 +431,7 @@ def get_courses_for_selection(
         每门课包含所有可选教学班信息
     """
     print("[*] 从 TIS 获取课程数据...")
-    all_courses = fetch_all_courses(headers, semester_info)
+    all_courses = fetch_all_courses(session, semester_info)
 
     # 硬编码：TIS API 无法查到但确实存在的课程
     _HARDCODED: dict[str, list[Section]] = {
@@ -307,6 +451,10 @@ def get_courses_for_selection(
             all_courses[hc_name] = hc_sections
             print(f"  [*] 补充硬编码课程: {hc_name}")
 
+    # 模糊匹配用的二元组索引，避免每个关键词都扫描全部课程名
+    shingle_index = _build_shingle_index(all_courses)
+    course_order = {course_name: i for i, course_name in enumerate(all_courses)}
+
     result: list[Course] = []
     not_found: list[str] = []
 
@@ -322,10 +470,17 @@ def get_courses_for_selection(
             continue
 
         # 模糊匹配：课程名包含用户输入的关键词
+        if len(name) < 2:
+            candidates = list(all_courses)
+        else:
+            shortlist = {cn for shingle in _shingles(name) for cn in shingle_index.get(shingle, ())}
+            shortlist.update(shingle_index.get("", ()))
+            candidates = sorted(shortlist, key=course_order.__getitem__)
+
         fuzzy_matches: list[tuple[str, list[Section]]] = []
-        for course_name, sections in all_courses.items():
+        for course_name in candidates:
             if name in course_name or course_name in name:
-                fuzzy_matches.append((course_name, sections))
+                fuzzy_matches.append((course_name, all_courses[course_name]))
 
         if len(fuzzy_matches) == 1:
             matched_name, sections = fuzzy_matches[0]
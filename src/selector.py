@@ -16,7 +16,7 @@ SELECT_URL = "https://tis.sustech.edu.cn/Xsxk/addGouwuche"
 
 
 def select_course(
-    headers: dict[str, str],
+    session: requests.Session,
     semester_info: dict,
     section: Section,
     to_selected: bool = True,
@@ -40,11 +40,9 @@ def select_course(
     }
 
     try:
-        resp = requests.post(
+        resp = session.post(
             SELECT_URL,
             data=data,
-            headers=headers,
-            verify=False,
             timeout=15,
         )
         resp.raise_for_status()
@@ -57,7 +55,7 @@ def select_course(
 
 
 def select_schedule(
-    headers: dict[str, str],
+    session: requests.Session,
     semester_info: dict,
     schedule: list[Section],
     delay: float = 1.6,
@@ -84,7 +82,7 @@ def select_schedule(
             continue
 
         print(f"  [{i+1}/{len(schedule)}] 选课: {section.course_name} ({section.section_name})...", end=" ", flush=True)
-        success, msg = select_course(headers, semester_info, section)
+        success, msg = select_course(session, semester_info, section)
 
         if success:
             print(f"\033[32m成功\033[0m - {msg}")
@@ -2,70 +2,40 @@
 
 from __future__ import annotations
 
-from .models import Course, Section, TimeSlot
+from collections import defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import islice, product
 
+from .models import Course, Section
 
-def _has_conflict(time_slots: list[TimeSlot], occupied: set[tuple[int, int]]) -> bool:
-    """检查给定的时间段是否与已占用的时间槽冲突。
 
-    Parameters
-    ----------
-    time_slots : list[TimeSlot]
-        待检查的时间段列表
-    occupied : set[tuple[int, int]]
-        已占用的 (weekday, period) 集合
+@dataclass
+class SolveResult:
+    """求解结果"""
 
-    Returns
-    -------
-    bool
-        True 表示存在冲突
-    """
-    for ts in time_slots:
-        for period in range(ts.start_period, ts.end_period + 1):
-            if (ts.weekday, period) in occupied:
-                return True
-    return False
+    schedules: list[list[Section]]  # 可行的选课方案
+    truncated: bool = False  # 是否因达到 max_results 上限而截断
 
 
-def _occupy(time_slots: list[TimeSlot], occupied: set[tuple[int, int]]) -> list[tuple[int, int]]:
-    """将时间段加入占用集合，返回新增的槽位列表（用于回溯释放）。"""
-    added: list[tuple[int, int]] = []
-    for ts in time_slots:
-        for period in range(ts.start_period, ts.end_period + 1):
-            key = (ts.weekday, period)
-            occupied.add(key)
-            added.append(key)
-    return added
-
-
-def _release(added: list[tuple[int, int]], occupied: set[tuple[int, int]]) -> None:
-    """从占用集合中释放之前添加的时间槽。"""
-    for key in added:
-        occupied.discard(key)
-
-
-def solve(
-    courses: list[Course],
-    max_results: int = 250,
-) -> list[list[Section]]:
-    """求解所有不冲突的课表组合。
+def iter_solve(courses: list[Course]) -> Iterator[list[Section]]:
+    """逐个生成不冲突的课表组合。
 
     对每门课程选择一个教学班，使得所有选中的教学班之间没有时间冲突。
+    结果逐个生成，solve 借此在取满 max_results 个方案后停止搜索，并判断是否截断。
 
     Parameters
     ----------
     courses : list[Course]
         用户想选的课程列表，每门课包含多个可选教学班
-    max_results : int
-        最多返回多少个结果（防止组合爆炸），默认 100
 
-    Returns
-    -------
-    list[list[Section]]
-        每个元素是一种可行的选课方案，方案中包含每门课对应的教学班
+    Yields
+    ------
+    list[Section]
+        一种可行的选课方案，方案中包含每门课对应的教学班
     """
     if not courses:
-        return []
+        return
 
     # 过滤掉没有教学班的课程
     valid_courses = [c for c in courses if c.sections]
@@ -75,59 +45,115 @@ def solve(
             print(f"  [!] 课程 \"{c.name}\" 没有可选的教学班，已跳过")
 
     if not valid_courses:
-        return []
-
-    # 剪枝优化：教学班数量少的课程排在前面（约束传播思想）
-    sorted_courses = sorted(valid_courses, key=lambda c: len(c.sections))
-
-    results: list[list[Section]] = []
-    occupied: set[tuple[int, int]] = set()
-    current_choice: list[Section] = []
-
-    def _backtrack(index: int) -> None:
-        # 找到足够多结果时停止
-        if len(results) >= max_results:
-            return
-
-        # 所有课程都已选择 -> 记录结果
-        if index == len(sorted_courses):
-            results.append(current_choice.copy())
-            return
-
-        course = sorted_courses[index]
-        for section in course.sections:
-            # 跳过没有时间信息的教学班（无法判断冲突）
-            if not section.time_slots:
-                # 没有时间信息的教学班视为不冲突，直接加入
-                current_choice.append(section)
-                _backtrack(index + 1)
-                current_choice.pop()
+        return
+
+    # 课程内：上课时间完全相同的教学班（通常只是教师不同）合并为一组，
+    # 搜索时每组只走一次分支，记录结果时再展开组内所有组合；
+    # 占用节数多的组优先尝试，尽早暴露冲突
+    course_groups: list[list[tuple[int, list[Section]]]] = []
+    for c in valid_courses:
+        groups: dict[int, list[Section]] = defaultdict(list)
+        for section in c.sections:
+            groups[section.period_mask].append(section)
+        course_groups.append(sorted(groups.items(), key=lambda g: g[0].bit_count(), reverse=True))
+
+    # 剪枝优化（MRV）：可选分组少的课程排在前面；分组数相同时，
+    # 占用总节数多的课程更受约束，也排在前面
+    course_groups.sort(key=lambda groups: (
+        len(groups),
+        -sum(mask.bit_count() * len(group) for mask, group in groups),
+    ))
+    # 前向检查用：每门课各组的掩码
+    future_masks: list[tuple[int, ...]] = [
+        tuple(mask for mask, _ in groups) for groups in course_groups
+    ]
+    n_courses = len(course_groups)
+
+    # 已占用时间槽的位掩码，每一位对应一个 (weekday, period)
+    occupied = 0
+    current_choice: list[list[Section]] = []
+
+    # 显式栈代替递归：每帧为 [课程下标, 分组迭代器, 本层已选分组的掩码]
+    # 掩码为 None 表示本层当前没有选中分组
+    stack: list[list] = [[0, iter(course_groups[0]), None]]
+    last_index = n_courses - 1
+
+    while stack:
+        frame = stack[-1]
+        index, groups_iter, applied = frame
+
+        # 回溯：撤销本层上一次的选择
+        if applied is not None:
+            current_choice.pop()
+            occupied ^= applied
+            frame[2] = None
+
+        for mask, group in groups_iter:
+            # 冲突检测（没有时间信息的教学班掩码为 0，视为不冲突）
+            if mask & occupied:
                 continue
 
-            # 冲突检测
-            if _has_conflict(section.time_slots, occupied):
+            # 前向检查：若某门后续课程的所有教学班都与新占用冲突，直接剪枝
+            new_occupied = occupied | mask
+            if any(
+                all(m & new_occupied for m in future_masks[j])
+                for j in range(index + 1, n_courses)
+            ):
                 continue
 
-            # 选择该教学班
-            added = _occupy(section.time_slots, occupied)
-            current_choice.append(section)
+            # 选择该分组
+            occupied = new_occupied
+            current_choice.append(group)
+            frame[2] = mask
 
-            _backtrack(index + 1)
+            if index == last_index:
+                # 所有课程都已选择 -> 展开各组教学班的组合
+                for combo in product(*current_choice):
+                    yield list(combo)
+            else:
+                stack.append([index + 1, iter(course_groups[index + 1]), None])
+            break
+        else:
+            # 本层分组已全部尝试，返回上一层
+            stack.pop()
 
-            # 回溯：撤销选择
-            current_choice.pop()
-            _release(added, occupied)
 
-    _backtrack(0)
-    return results
+def solve(
+    courses: list[Course],
+    max_results: int = 250,
+) -> SolveResult:
+    """求解所有不冲突的课表组合。
+
+    达到 max_results 后立即停止搜索，并在结果中标记为已截断。
+
+    Parameters
+    ----------
+    courses : list[Course]
+        用户想选的课程列表，每门课包含多个可选教学班
+    max_results : int
+        最多返回多少个结果（防止组合爆炸），默认 250
+
+    Returns
+    -------
+    SolveResult
+        schedules 的每个元素是一种可行的选课方案，方案中包含每门课对应的教学班；
+        truncated 表示是否还有未返回的方案
+    """
+    solutions = iter_solve(courses)
+    schedules = list(islice(solutions, max(max_results, 0)))
+    # 再多取一个方案，判断结果是否被截断
+    truncated = next(solutions, None) is not None
+    return SolveResult(schedules=schedules, truncated=truncated)
 
 
-def print_solve_summary(courses: list[Course], results: list[list[Section]]) -> None:
+def print_solve_summary(courses: list[Course], result: SolveResult) -> None:
     """打印求解摘要信息。"""
     print(f"\n{'=' * 50}")
     print(f"求解完成！")
     print(f"  课程数: {len(courses)}")
     total_sections = sum(len(c.sections) for c in courses)
     print(f"  总教学班数: {total_sections}")
-    print(f"  可行方案数: {len(results)}")
+    print(f"  可行方案数: {len(result.schedules)}")
+    if result.truncated:
+        print(f"  [!] 方案数已达上限，仅保留前 {len(result.schedules)} 种；可减少候选课程或教学班后重试")
     print(f"{'=' * 50}\n")